@@ -1,20 +1,34 @@
 """FastAPI application for URL shortening service."""
 
+import asyncio
+import base64
+import collections
+import contextlib
 import hashlib
 import json
+import logging
 import os
-from collections.abc import Generator
-from contextlib import contextmanager
+import string
+from collections.abc import AsyncGenerator, Coroutine
+from contextlib import asynccontextmanager
+from io import BytesIO
 from typing import Any
 
-import psycopg2
-import psycopg2.extensions
+import psycopg
 import redis
+import redis.asyncio
+import segno
+import xxhash
 from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
 from pydantic import BaseModel, HttpUrl
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+
+logger = logging.getLogger(__name__)
 
 # Prometheus metrics
 http_requests_total = Counter(
@@ -31,6 +45,29 @@ urls_created_total = Counter("urls_created_total", "Total URLs created")
 
 urls_clicked_total = Counter("urls_clicked_total", "Total URL clicks")
 
+# Label children bound once, so handlers skip the per-request label lookup
+ENDPOINT_STATUSES = {
+    ("POST", "/shorten"): ("200", "409", "500"),
+    ("GET", "/{short_code}"): ("307", "404"),
+    ("GET", "/stats/{short_code}"): ("200", "404"),
+    ("GET", "/qr/{short_code}"): ("200", "404"),
+}
+
+REQUEST_TIMERS = {
+    (method, endpoint): http_request_duration_seconds.labels(
+        method=method, endpoint=endpoint
+    )
+    for method, endpoint in ENDPOINT_STATUSES
+}
+
+REQUEST_COUNTERS = {
+    (method, endpoint, status): http_requests_total.labels(
+        method=method, endpoint=endpoint, status=status
+    )
+    for (method, endpoint), statuses in ENDPOINT_STATUSES.items()
+    for status in statuses
+}
+
 # Config from environment
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
@@ -41,31 +78,75 @@ POSTGRES_DB = os.getenv("POSTGRES_DB", "urlshortener")
 POSTGRES_USER = os.getenv("POSTGRES_USER", "urlshort")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password123")
 BASE_URL = os.getenv("BASE_URL", "http://localhost:8080")
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 5))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 20))
+# Keep pooled connections alive long enough for their prepared statements to pay off
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", 1800))
+# Executions of the same query before psycopg prepares it server-side
+DB_PREPARE_THRESHOLD = int(os.getenv("DB_PREPARE_THRESHOLD", 5))
+# Buffered analytics events are flushed every interval or once the batch fills up
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", 0.05))
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", 500))
+# "xxh3" (default) or "md5" to keep generating legacy hex short codes
+SHORT_CODE_HASH = os.getenv("SHORT_CODE_HASH", "xxh3")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 64))
+# Seconds to wait for a free Redis connection before raising
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
+# How often click counts accumulated in Redis are written back to Postgres
+CLICK_FLUSH_INTERVAL = float(os.getenv("CLICK_FLUSH_INTERVAL", 5))
+
+# QR codes are rendered on demand by GET /qr/{short_code}, not queued
+JOB_TYPES = ("screenshot", "metadata")
+
+SHORT_CODE_LENGTH = 6
+BASE62_ALPHABET = string.digits + string.ascii_letters
+SHORT_CODE_SPACE = len(BASE62_ALPHABET) ** SHORT_CODE_LENGTH
 
 # Redis connection
-redis_client = redis.Redis(
-    host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD, decode_responses=True
+# Callers wait for a free pooled connection instead of failing once the cap is hit
+redis_client = redis.asyncio.Redis(
+    connection_pool=redis.asyncio.BlockingConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        password=REDIS_PASSWORD,
+        decode_responses=True,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+    )
 )
 
+# Atomically read and reset the pending click counts hash
+drain_clicks = redis_client.register_script("""
+local counts = redis.call('HGETALL', KEYS[1])
+redis.call('DEL', KEYS[1])
+return counts
+""")
+
+# Postgres connection pool, created on startup
+db_pool: AsyncConnectionPool | None = None
+
+# Serialized analytics events waiting to be pushed to Redis
+analytics_buffer: list[str] = []
+
+# Set when the analytics buffer fills up, to flush before the interval elapses
+analytics_full = asyncio.Event()
+
+# Clicks per short code since the last flush to Redis
+pending_clicks: collections.Counter[str] = collections.Counter()
+
+# Background tasks, kept referenced until done and cancelled on shutdown
+background_tasks: set[asyncio.Task] = set()
+
 
-@contextmanager
-def get_db() -> Generator[psycopg2.extensions.connection, None, None]:
-    """Get database connection context manager.
+@asynccontextmanager
+async def get_db() -> AsyncGenerator[psycopg.AsyncConnection, None]:
+    """Borrow a connection from the pool for the duration of the context.
 
     Yields:
         Database connection object.
     """
-    conn = psycopg2.connect(
-        host=POSTGRES_HOST,
-        port=POSTGRES_PORT,
-        database=POSTGRES_DB,
-        user=POSTGRES_USER,
-        password=POSTGRES_PASSWORD,
-    )
-    try:
+    async with db_pool.connection() as conn:
         yield conn
-    finally:
-        conn.close()
 
 
 class URLCreate(BaseModel):
@@ -90,35 +171,215 @@ def generate_short_code(url: str) -> str:
         url: The URL to generate a short code for.
 
     Returns:
-        A 6-character short code derived from the URL hash.
+        A 6-character base62 short code derived from the URL's xxh3 hash,
+        or its MD5 hex prefix when SHORT_CODE_HASH is "md5".
     """
-    hash_object = hashlib.md5(url.encode(), usedforsecurity=False)  # noqa: S324
-    return hash_object.hexdigest()[:6]
+    if SHORT_CODE_HASH == "md5":
+        hash_object = hashlib.md5(url.encode(), usedforsecurity=False)  # noqa: S324
+        return hash_object.hexdigest()[:SHORT_CODE_LENGTH]
 
+    value = xxhash.xxh3_64_intdigest(url.encode()) % SHORT_CODE_SPACE
+    chars = []
+    for _ in range(SHORT_CODE_LENGTH):
+        value, index = divmod(value, len(BASE62_ALPHABET))
+        chars.append(BASE62_ALPHABET[index])
+    return "".join(chars)
 
-def queue_jobs(short_code: str, original_url: str) -> None:
-    """Push jobs to Redis queue.
+
+async def queue_jobs(short_code: str, original_url: str) -> None:
+    """Push jobs to Redis queue in a single RPUSH.
 
     Args:
         short_code: The short code for the URL.
         original_url: The original URL being shortened.
     """
-    jobs = [
-        {"type": "qr_code", "short_code": short_code, "url": original_url},
-        {"type": "screenshot", "short_code": short_code, "url": original_url},
-        {"type": "metadata", "short_code": short_code, "url": original_url},
-    ]
+    # Encode the shared fields once and splice each job type in front of them
+    payload_tail = json.dumps({"short_code": short_code, "url": original_url})[1:]
+    jobs = [f'{{"type": "{job_type}", {payload_tail}' for job_type in JOB_TYPES]
+
+    await redis_client.rpush("job_queue", *jobs)
+
+
+def render_qr_code(url: str) -> bytes:
+    """Render a QR code for the URL as PNG.
+
+    Args:
+        url: The URL to encode.
+
+    Returns:
+        The PNG image bytes.
+    """
+    qr = segno.make(url, error="m")
+    buffered = BytesIO()
+    qr.save(buffered, kind="png", scale=10, border=5)
+    return buffered.getvalue()
+
+
+def run_in_background(coro: Coroutine[Any, Any, Any]) -> None:
+    """Schedule a coroutine without waiting for it.
+
+    Args:
+        coro: The coroutine to run.
+    """
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+def track_event(event: dict[str, str]) -> None:
+    """Buffer an analytics event for the next batched push to Redis.
+
+    Args:
+        event: The analytics event to record.
+    """
+    analytics_buffer.append(json.dumps(event))
+    if len(analytics_buffer) >= ANALYTICS_BATCH_SIZE:
+        analytics_full.set()
+
+
+async def flush_analytics() -> None:
+    """Push buffered analytics events and click counts to Redis in one round trip.
+
+    Delivery is best effort for analytics events: a failed push drops them
+    rather than stalling the request path. Click counts are kept and retried
+    on the next flush.
+    """
+    if not analytics_buffer and not pending_clicks:
+        return
+
+    batch = analytics_buffer.copy()
+    analytics_buffer.clear()
+    clicks = pending_clicks.copy()
+    pending_clicks.clear()
+
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            if batch:
+                pipe.rpush("analytics_queue", *batch)
+            for short_code, count in clicks.items():
+                pipe.hincrby("clicks_pending", short_code, count)
+            await pipe.execute()
+    except redis.RedisError:
+        pending_clicks.update(clicks)
+        logger.exception("Dropped %d analytics events", len(batch))
+    except BaseException:
+        # Cancelled mid-flush on shutdown: put everything back so the final
+        # flush in shutdown_event sends it
+        analytics_buffer[:0] = batch
+        pending_clicks.update(clicks)
+        raise
+
+
+async def analytics_flusher() -> None:
+    """Flush the analytics buffer every interval, or sooner once it fills up."""
+    while True:
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(analytics_full.wait(), ANALYTICS_FLUSH_INTERVAL)
+        analytics_full.clear()
+        await flush_analytics()
+
+
+async def persist_clicks() -> None:
+    """Move accumulated click counts from Redis into Postgres in one UPDATE."""
+    flat = await drain_clicks(keys=["clicks_pending"])
+    if not flat:
+        return
+
+    short_codes = flat[0::2]
+    deltas = [int(v) for v in flat[1::2]]
+    committed = False
+    try:
+        async with get_db() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """UPDATE urls SET clicks = urls.clicks + t.delta
+                       FROM unnest(%s::text[], %s::int[]) AS t(short_code, delta)
+                       WHERE urls.short_code = t.short_code""",
+                    (short_codes, deltas),
+                )
+                await conn.commit()
+                committed = True
+    finally:
+        # Hand the counts back so the next flush retries them, including when
+        # the flusher is cancelled mid-update on shutdown
+        if not committed:
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    for short_code, delta in zip(short_codes, deltas):
+                        pipe.hincrby("clicks_pending", short_code, delta)
+                    await pipe.execute()
+            except BaseException:
+                logger.exception(
+                    "Lost click counts: %s", dict(zip(short_codes, deltas))
+                )
+                raise
 
-    for job in jobs:
-        redis_client.rpush("job_queue", json.dumps(job))
+
+async def click_flusher() -> None:
+    """Persist pending click counts every CLICK_FLUSH_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(CLICK_FLUSH_INTERVAL)
+        try:
+            await persist_clicks()
+        except Exception:
+            logger.exception("Failed to persist click counts")
+
+
+async def resolve_url(short_code: str) -> str | None:
+    """Look up the original URL for a short code, checking the cache first.
+
+    Args:
+        short_code: The short code to look up.
+
+    Returns:
+        The original URL, or None if the short code does not exist.
+    """
+    cached = await redis_client.get(f"url:{short_code}")
+    if cached:
+        return cached
+
+    async with get_db() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT original_url FROM urls WHERE short_code = %s",
+                (short_code,),
+            )
+            result = await cur.fetchone()
+
+    if not result:
+        return None
+
+    # Cache for 1 hour, off the response path
+    run_in_background(redis_client.setex(f"url:{short_code}", 3600, result[0]))
+    return result[0]
 
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    """Initialize database tables."""
-    with get_db() as conn:
-        with conn.cursor() as cur:
-            cur.execute("""
+    """Open the connection pool and initialize database tables."""
+    global db_pool
+    db_pool = AsyncConnectionPool(
+        make_conninfo(
+            host=POSTGRES_HOST,
+            port=POSTGRES_PORT,
+            dbname=POSTGRES_DB,
+            user=POSTGRES_USER,
+            password=POSTGRES_PASSWORD,
+        ),
+        min_size=DB_POOL_MIN,
+        max_size=DB_POOL_MAX,
+        max_lifetime=DB_POOL_MAX_LIFETIME,
+        kwargs={"prepare_threshold": DB_PREPARE_THRESHOLD},
+        open=False,
+    )
+    await db_pool.open()
+
+    run_in_background(analytics_flusher())
+    run_in_background(click_flusher())
+
+    async with get_db() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("""
                 CREATE TABLE IF NOT EXISTS urls (
                     id SERIAL PRIMARY KEY,
                     short_code VARCHAR(10) UNIQUE NOT NULL,
@@ -127,8 +388,10 @@ async def startup_event() -> None:
                     clicks INTEGER DEFAULT 0
                 )
             """)
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS jobs (
+            # Job results can be regenerated, so skip WAL for this insert-heavy
+            # table; Postgres truncates it after a crash
+            await cur.execute("""
+                CREATE UNLOGGED TABLE IF NOT EXISTS jobs (
                     id SERIAL PRIMARY KEY,
                     short_code VARCHAR(10),
                     job_type VARCHAR(50),
@@ -137,7 +400,23 @@ async def startup_event() -> None:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
-            conn.commit()
+            await cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_short_code ON jobs (short_code)"
+            )
+            await conn.commit()
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """Stop background tasks, flush pending events and close connections."""
+    for task in list(background_tasks):
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await flush_analytics()
+    await redis_client.aclose(close_connection_pool=True)
+
+    if db_pool is not None:
+        await db_pool.close()
 
 
 @app.get("/metrics")
@@ -171,10 +450,10 @@ async def ready() -> dict[str, str]:
         HTTPException: If service is not ready.
     """
     try:
-        redis_client.ping()
-        with get_db() as conn:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
+        await redis_client.ping()
+        async with get_db() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT 1")
         return {"status": "ready"}
     except Exception as e:
         raise HTTPException(status_code=503, detail=f"Not ready: {str(e)}") from e
@@ -193,43 +472,63 @@ async def shorten_url(url_data: URLCreate) -> URLResponse:
     Raises:
         HTTPException: If short code already exists or on error.
     """
-    with http_request_duration_seconds.labels(
-        method="POST", endpoint="/shorten"
-    ).time():
+    with REQUEST_TIMERS[("POST", "/shorten")].time():
         original_url = str(url_data.url)
         short_code = url_data.custom_code or generate_short_code(original_url)
 
-        with get_db() as conn:
-            with conn.cursor() as cur:
+        # Claim the code in Redis first; a repeat shorten of the same URL is
+        # answered from there without touching Postgres. SET NX GET returns
+        # the existing value, or None if this request took the claim.
+        code_key = f"code:{short_code}"
+        existing = await redis_client.set(
+            code_key, original_url, nx=True, get=True, ex=3600
+        )
+        claimed = existing is None
+        if existing == original_url:
+            REQUEST_COUNTERS[("POST", "/shorten", "200")].inc()
+            return URLResponse(
+                short_url=f"{BASE_URL}/{short_code}",
+                original_url=original_url,
+                short_code=short_code,
+            )
+
+        async with get_db() as conn:
+            async with conn.cursor() as cur:
                 try:
-                    cur.execute(
-                        "INSERT INTO urls (short_code, original_url) VALUES (%s, %s) ON CONFLICT (short_code) DO NOTHING RETURNING short_code",
+                    # The no-op update makes RETURNING yield the stored row on
+                    # conflict; xmax = 0 only for a freshly inserted row
+                    await cur.execute(
+                        """INSERT INTO urls (short_code, original_url) VALUES (%s, %s)
+                           ON CONFLICT (short_code) DO UPDATE SET short_code = EXCLUDED.short_code
+                           RETURNING original_url, (xmax = 0) AS inserted""",
                         (short_code, original_url),
                     )
-                    result = cur.fetchone()
-                    conn.commit()
-
-                    if result is None:
-                        http_requests_total.labels(
-                            method="POST", endpoint="/shorten", status="409"
-                        ).inc()
+                    stored_url, inserted = await cur.fetchone()
+                    await conn.commit()
+
+                    if not inserted:
+                        if stored_url == original_url:
+                            REQUEST_COUNTERS[("POST", "/shorten", "200")].inc()
+                            return URLResponse(
+                                short_url=f"{BASE_URL}/{short_code}",
+                                original_url=original_url,
+                                short_code=short_code,
+                            )
+                        if claimed:
+                            await redis_client.delete(code_key)
+                        REQUEST_COUNTERS[("POST", "/shorten", "409")].inc()
                         raise HTTPException(
                             status_code=409, detail="Short code already exists"
                         )
 
                     # Queue background jobs
-                    queue_jobs(short_code, original_url)
+                    await queue_jobs(short_code, original_url)
 
                     # Track analytics event
-                    redis_client.rpush(
-                        "analytics_queue",
-                        json.dumps({"event": "url_created", "short_code": short_code}),
-                    )
+                    track_event({"event": "url_created", "short_code": short_code})
 
                     urls_created_total.inc()
-                    http_requests_total.labels(
-                        method="POST", endpoint="/shorten", status="200"
-                    ).inc()
+                    REQUEST_COUNTERS[("POST", "/shorten", "200")].inc()
 
                     return URLResponse(
                         short_url=f"{BASE_URL}/{short_code}",
@@ -239,71 +538,40 @@ async def shorten_url(url_data: URLCreate) -> URLResponse:
                 except HTTPException:
                     raise
                 except Exception as e:
-                    conn.rollback()
-                    http_requests_total.labels(
-                        method="POST", endpoint="/shorten", status="500"
-                    ).inc()
+                    await conn.rollback()
+                    if claimed:
+                        await redis_client.delete(code_key)
+                    REQUEST_COUNTERS[("POST", "/shorten", "500")].inc()
                     raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@app.get("/{short_code}")
-async def redirect_url(short_code: str) -> dict[str, str]:
+@app.get("/{short_code}", response_model=None, status_code=307)
+async def redirect_url(short_code: str) -> RedirectResponse:
     """Redirect to original URL.
 
     Args:
         short_code: The short code to look up.
 
     Returns:
-        Dictionary with redirect URL.
+        Temporary redirect to the original URL.
 
     Raises:
         HTTPException: If URL not found.
     """
-    with http_request_duration_seconds.labels(
-        method="GET", endpoint="/{short_code}"
-    ).time():
-        # Check cache first
-        cached = redis_client.get(f"url:{short_code}")
-        if cached:
-            original_url = cached
-        else:
-            with get_db() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "SELECT original_url FROM urls WHERE short_code = %s",
-                        (short_code,),
-                    )
-                    result = cur.fetchone()
-
-                    if not result:
-                        http_requests_total.labels(
-                            method="GET", endpoint="/{short_code}", status="404"
-                        ).inc()
-                        raise HTTPException(status_code=404, detail="URL not found")
-
-                    original_url = result[0]
-                    # Cache for 1 hour
-                    redis_client.setex(f"url:{short_code}", 3600, original_url)
-
-                    # Increment click counter
-                    cur.execute(
-                        "UPDATE urls SET clicks = clicks + 1 WHERE short_code = %s",
-                        (short_code,),
-                    )
-                    conn.commit()
+    with REQUEST_TIMERS[("GET", "/{short_code}")].time():
+        original_url = await resolve_url(short_code)
+        if original_url is None:
+            REQUEST_COUNTERS[("GET", "/{short_code}", "404")].inc()
+            raise HTTPException(status_code=404, detail="URL not found")
 
-        # Queue analytics event
-        redis_client.rpush(
-            "analytics_queue",
-            json.dumps({"event": "url_clicked", "short_code": short_code}),
-        )
+        # Count the click and queue analytics event; both are flushed in batches
+        pending_clicks[short_code] += 1
+        track_event({"event": "url_clicked", "short_code": short_code})
 
         urls_clicked_total.inc()
-        http_requests_total.labels(
-            method="GET", endpoint="/{short_code}", status="200"
-        ).inc()
+        REQUEST_COUNTERS[("GET", "/{short_code}", "307")].inc()
 
-        return {"redirect_url": original_url}
+        return RedirectResponse(url=original_url, status_code=307)
 
 
 @app.get("/stats/{short_code}")
@@ -319,45 +587,82 @@ async def get_stats(short_code: str) -> dict[str, Any]:
     Raises:
         HTTPException: If URL not found.
     """
-    with http_request_duration_seconds.labels(
-        method="GET", endpoint="/stats/{short_code}"
-    ).time():
-        with get_db() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT original_url, clicks, created_at FROM urls WHERE short_code = %s",
+    with REQUEST_TIMERS[("GET", "/stats/{short_code}")].time():
+        async with get_db() as conn:
+            async with conn.cursor() as cur:
+                # URL row and its job results in one round trip
+                await cur.execute(
+                    """SELECT u.original_url, u.clicks, u.created_at,
+                              COALESCE(
+                                  json_agg(
+                                      json_build_object(
+                                          'type', j.job_type,
+                                          'status', j.status,
+                                          'result', j.result
+                                      )
+                                      ORDER BY j.id
+                                  ) FILTER (WHERE j.id IS NOT NULL),
+                                  '[]'
+                              )
+                       FROM urls u
+                       LEFT JOIN jobs j USING (short_code)
+                       WHERE u.short_code = %s
+                       GROUP BY u.id""",
                     (short_code,),
                 )
-                result = cur.fetchone()
+                result = await cur.fetchone()
 
                 if not result:
-                    http_requests_total.labels(
-                        method="GET", endpoint="/stats/{short_code}", status="404"
-                    ).inc()
+                    REQUEST_COUNTERS[("GET", "/stats/{short_code}", "404")].inc()
                     raise HTTPException(status_code=404, detail="URL not found")
 
-                # Get job results
-                cur.execute(
-                    "SELECT job_type, status, result FROM jobs WHERE short_code = %s",
-                    (short_code,),
-                )
-                jobs = cur.fetchall()
-
-                http_requests_total.labels(
-                    method="GET", endpoint="/stats/{short_code}", status="200"
-                ).inc()
+                REQUEST_COUNTERS[("GET", "/stats/{short_code}", "200")].inc()
 
                 return {
                     "short_code": short_code,
                     "original_url": result[0],
                     "clicks": result[1],
                     "created_at": result[2],
-                    "jobs": [
-                        {"type": j[0], "status": j[1], "result": j[2]} for j in jobs
-                    ],
+                    "jobs": result[3],
                 }
 
 
+@app.get("/qr/{short_code}")
+async def get_qr_code(short_code: str) -> Response:
+    """Get the QR code for a URL, rendering it on first request.
+
+    Args:
+        short_code: The short code whose URL to encode.
+
+    Returns:
+        PNG image of the QR code.
+
+    Raises:
+        HTTPException: If URL not found.
+    """
+    with REQUEST_TIMERS[("GET", "/qr/{short_code}")].time():
+        cached = await redis_client.get(f"qr:{short_code}")
+        if cached:
+            png = base64.b64decode(cached)
+        else:
+            original_url = await resolve_url(short_code)
+            if original_url is None:
+                REQUEST_COUNTERS[("GET", "/qr/{short_code}", "404")].inc()
+                raise HTTPException(status_code=404, detail="URL not found")
+
+            png = await asyncio.to_thread(render_qr_code, original_url)
+            # Cache for 1 day; stored as base64 since the client decodes to str
+            run_in_background(
+                redis_client.setex(
+                    f"qr:{short_code}", 86400, base64.b64encode(png).decode()
+                )
+            )
+
+        REQUEST_COUNTERS[("GET", "/qr/{short_code}", "200")].inc()
+
+        return Response(content=png, media_type="image/png")
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -31,6 +31,11 @@ echo "Waiting for databases to be ready..."
 kubectl wait --for=condition=ready pod -l app=postgres -n urlshortener --timeout=120s || true
 kubectl wait --for=condition=ready pod -l app=redis -n urlshortener --timeout=120s || true
 
+echo ""
+echo "Deploying PgBouncer..."
+kubectl apply -f k8s/base/pgbouncer.yaml
+kubectl wait --for=condition=ready pod -l app=pgbouncer -n urlshortener --timeout=120s || true
+
 echo ""
 echo "Checking KEDA installation (required for queue-based autoscaling)..."
 if ! kubectl get crd scaledobjects.keda.sh &> /dev/null; then
@@ -1,19 +1,25 @@
 """Worker service for processing background jobs."""
 
-import base64
+import csv
 import json
+import logging
 import os
+import queue
+import signal
+import sys
+import threading
 import time
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from io import BytesIO
+from io import StringIO
+from logging.handlers import QueueHandler, QueueListener
 
-import psycopg2
+import httpx
 import psycopg2.extensions
-import qrcode
 import redis
-import requests
 from prometheus_client import Counter, Histogram, start_http_server
+from psycopg2.pool import ThreadedConnectionPool
 
 # Config from environment
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
@@ -25,12 +31,30 @@ POSTGRES_DB = os.getenv("POSTGRES_DB", "urlshortener")
 POSTGRES_USER = os.getenv("POSTGRES_USER", "urlshort")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password123")
 WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", 5))
+# Upper bound on jobs popped from Redis per round trip
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", 32))
+# Job results are written once this many are pending or the interval elapses
+RESULT_BATCH_SIZE = int(os.getenv("RESULT_BATCH_SIZE", 500))
+RESULT_FLUSH_INTERVAL = float(os.getenv("RESULT_FLUSH_INTERVAL", 0.2))
+# Seconds to wait before retrying a failed batch of job results
+RESULT_RETRY_DELAY = float(os.getenv("RESULT_RETRY_DELAY", 1))
+
+logger = logging.getLogger(__name__)
 
 # Redis connection
 redis_client = redis.Redis(
     host=REDIS_HOST, port=REDIS_PORT, password=REDIS_PASSWORD, decode_responses=True
 )
 
+# Shared HTTP client so metadata fetches reuse keep-alive/HTTP2 connections
+http_client = httpx.Client(
+    http2=True,
+    timeout=10,
+    follow_redirects=True,
+    headers={"User-Agent": "URLShortener-Bot/1.0"},
+    limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+)
+
 # Prometheus metrics
 jobs_processed_total = Counter(
     "jobs_processed_total", "Total jobs processed", ["job_type", "status"]
@@ -42,29 +66,35 @@ job_processing_duration_seconds = Histogram(
     ["job_type"],
 )
 
+# Postgres connection pool, created when the worker starts
+db_pool: ThreadedConnectionPool | None = None
+
+# One slot per worker thread; a job is only taken off the queue once a slot is free
+job_slots = threading.BoundedSemaphore(WORKER_CONCURRENCY)
+
+# Completed job rows waiting for the result flusher thread
+results_queue: queue.Queue[tuple[str, str, str, str]] = queue.Queue()
+
+# Set on SIGTERM/SIGINT; the fetch loop stops and buffered work is drained
+shutdown = threading.Event()
+
 
 @contextmanager
 def get_db() -> Generator[psycopg2.extensions.connection, None, None]:
-    """Get database connection context manager.
+    """Borrow a connection from the pool for the duration of the context.
 
     Yields:
         Database connection object.
     """
-    conn = psycopg2.connect(
-        host=POSTGRES_HOST,
-        port=POSTGRES_PORT,
-        database=POSTGRES_DB,
-        user=POSTGRES_USER,
-        password=POSTGRES_PASSWORD,
-    )
+    conn = db_pool.getconn()
     try:
         yield conn
     finally:
-        conn.close()
+        db_pool.putconn(conn, close=bool(conn.closed))
 
 
 def save_job_result(short_code: str, job_type: str, status: str, result: dict) -> None:
-    """Save job result to database.
+    """Queue job result for the next batched write to the database.
 
     Args:
         short_code: The short code associated with the job.
@@ -72,45 +102,64 @@ def save_job_result(short_code: str, job_type: str, status: str, result: dict) -
         status: The status of the job.
         result: The result dictionary to save.
     """
-    with get_db() as conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """INSERT INTO jobs (short_code, job_type, status, result)
-                   VALUES (%s, %s, %s, %s)""",
-                (short_code, job_type, status, json.dumps(result)),
-            )
-            conn.commit()
+    results_queue.put((short_code, job_type, status, json.dumps(result)))
 
 
-def process_qr_code(job: dict) -> None:
-    """Generate QR code for the URL.
+def write_job_results(rows: list[tuple[str, str, str, str]]) -> None:
+    """Bulk load a batch of job results with COPY and commit.
 
     Args:
-        job: Dictionary containing job data with 'short_code' and 'url' keys.
+        rows: Tuples of (short_code, job_type, status, result JSON).
     """
-    print(f"Processing QR code for {job['short_code']}")
-    with job_processing_duration_seconds.labels(job_type="qr_code").time():
+    buffer = StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    buffer.seek(0)
+
+    with get_db() as conn:
         try:
-            qr = qrcode.QRCode(version=1, box_size=10, border=5)
-            qr.add_data(job["url"])
-            qr.make(fit=True)
+            with conn.cursor() as cur:
+                cur.copy_expert(
+                    "COPY jobs (short_code, job_type, status, result) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+            conn.commit()
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
 
-            img = qr.make_image(fill_color="black", back_color="white")
 
-            # Convert to base64
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            img_str = base64.b64encode(buffered.getvalue()).decode()
+def flush_job_results(stop: threading.Event) -> None:
+    """Write queued job results in batches until stopped and drained.
 
-            result = {"qr_code": img_str, "format": "png"}
-            save_job_result(job["short_code"], "qr_code", "completed", result)
-            jobs_processed_total.labels(job_type="qr_code", status="completed").inc()
-            print(f"QR code generated for {job['short_code']}")
+    Args:
+        stop: Event set when the worker is shutting down.
+    """
+    while not (stop.is_set() and results_queue.empty()):
+        try:
+            rows = [results_queue.get(timeout=RESULT_FLUSH_INTERVAL)]
+        except queue.Empty:
+            continue
+
+        # Gather more rows until the batch is full or the interval runs out
+        deadline = time.monotonic() + RESULT_FLUSH_INTERVAL
+        while len(rows) < RESULT_BATCH_SIZE:
+            try:
+                rows.append(
+                    results_queue.get(timeout=max(deadline - time.monotonic(), 0))
+                )
+            except queue.Empty:
+                break
 
+        try:
+            write_job_results(rows)
         except Exception as e:
-            print(f"Error generating QR code: {e}")
-            save_job_result(job["short_code"], "qr_code", "failed", {"error": str(e)})
-            jobs_processed_total.labels(job_type="qr_code", status="failed").inc()
+            # Requeue the batch so it is retried rather than lost
+            logger.error("Error saving %d job results, retrying: %s", len(rows), e)
+            for row in rows:
+                results_queue.put(row)
+            time.sleep(RESULT_RETRY_DELAY)
 
 
 def process_screenshot(job: dict) -> None:
@@ -119,7 +168,7 @@ def process_screenshot(job: dict) -> None:
     Args:
         job: Dictionary containing job data with 'short_code' and 'url' keys.
     """
-    print(f"Processing screenshot for {job['short_code']}")
+    logger.info("Processing screenshot for %s", job["short_code"])
     with job_processing_duration_seconds.labels(job_type="screenshot").time():
         try:
             # In a real implementation, you'd use Puppeteer/Playwright
@@ -132,10 +181,10 @@ def process_screenshot(job: dict) -> None:
             }
             save_job_result(job["short_code"], "screenshot", "completed", result)
             jobs_processed_total.labels(job_type="screenshot", status="completed").inc()
-            print(f"Screenshot processed for {job['short_code']}")
+            logger.info("Screenshot processed for %s", job["short_code"])
 
         except Exception as e:
-            print(f"Error taking screenshot: {e}")
+            logger.error("Error taking screenshot: %s", e)
             save_job_result(
                 job["short_code"], "screenshot", "failed", {"error": str(e)}
             )
@@ -148,13 +197,11 @@ def process_metadata(job: dict) -> None:
     Args:
         job: Dictionary containing job data with 'short_code' and 'url' keys.
     """
-    print(f"Processing metadata for {job['short_code']}")
+    logger.info("Processing metadata for %s", job["short_code"])
     with job_processing_duration_seconds.labels(job_type="metadata").time():
         try:
             # Fetch the URL and extract basic info
-            response = requests.get(
-                job["url"], timeout=10, headers={"User-Agent": "URLShortener-Bot/1.0"}
-            )
+            response = http_client.get(job["url"])
 
             result = {
                 "title": "Page Title",  # Would extract from HTML
@@ -165,17 +212,16 @@ def process_metadata(job: dict) -> None:
 
             save_job_result(job["short_code"], "metadata", "completed", result)
             jobs_processed_total.labels(job_type="metadata", status="completed").inc()
-            print(f"Metadata fetched for {job['short_code']}")
+            logger.info("Metadata fetched for %s", job["short_code"])
 
         except Exception as e:
-            print(f"Error fetching metadata: {e}")
+            logger.error("Error fetching metadata: %s", e)
             save_job_result(job["short_code"], "metadata", "failed", {"error": str(e)})
             jobs_processed_total.labels(job_type="metadata", status="failed").inc()
 
 
 # Job processors map
 JOB_PROCESSORS = {
-    "qr_code": process_qr_code,
     "screenshot": process_screenshot,
     "metadata": process_metadata,
 }
@@ -193,36 +239,132 @@ def process_job(job_data: dict) -> None:
     if processor:
         processor(job_data)
     else:
-        print(f"Unknown job type: {job_type}")
+        logger.warning("Unknown job type: %s", job_type)
+
+
+def handle_job(job_json: str) -> None:
+    """Decode and process a queued job, then free its worker slot.
+
+    Args:
+        job_json: The raw JSON payload popped from the job queue.
+    """
+    try:
+        job_data = json.loads(job_json)
+        logger.info("Processing job: %s", job_data)
+        process_job(job_data)
+    except Exception as e:
+        logger.error("Error processing job: %s", e)
+    finally:
+        job_slots.release()
+
+
+def setup_logging() -> QueueListener:
+    """Send log records through a queue so a background thread does the writes.
+
+    Returns:
+        The started listener; stop it on shutdown to flush pending records.
+    """
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(-1)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s [%(threadName)s] %(message)s")
+    )
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+    # httpx logs every request at INFO; keep metadata fetches out of the log
+    for name in ("httpx", "httpcore"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    return listener
+
+
+def request_shutdown(signum: int, frame: object) -> None:
+    """Signal handler that asks the fetch loop to stop.
+
+    Args:
+        signum: The signal number received.
+        frame: The current stack frame (unused).
+    """
+    logger.info("Received %s, worker shutting down...", signal.Signals(signum).name)
+    shutdown.set()
 
 
 def main() -> None:
     """Main worker loop."""
-    print(f"Worker started. Concurrency: {WORKER_CONCURRENCY}")
-    print(f"Connecting to Redis at {REDIS_HOST}:{REDIS_PORT}")
+    global db_pool
+    log_listener = setup_logging()
+    # Kubernetes stops pods with SIGTERM; finish in-flight jobs before exiting
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+    logger.info("Worker started. Concurrency: %s", WORKER_CONCURRENCY)
+    logger.info("Connecting to Redis at %s:%s", REDIS_HOST, REDIS_PORT)
+
+    # Only the result flusher thread talks to Postgres
+    db_pool = ThreadedConnectionPool(
+        minconn=1,
+        maxconn=1,
+        host=POSTGRES_HOST,
+        port=POSTGRES_PORT,
+        database=POSTGRES_DB,
+        user=POSTGRES_USER,
+        password=POSTGRES_PASSWORD,
+    )
 
     # Start Prometheus metrics server on port 8080
     start_http_server(8080)
-    print("Prometheus metrics server started on port 8080")
+    logger.info("Prometheus metrics server started on port 8080")
+
+    stop_flusher = threading.Event()
+    flusher = threading.Thread(
+        target=flush_job_results, args=(stop_flusher,), daemon=True
+    )
+    flusher.start()
 
-    while True:
+    executor = ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY)
+
+    while not shutdown.is_set():
         try:
-            # Block until job is available (BLPOP with 1 second timeout)
-            result = redis_client.blpop("job_queue", timeout=1)
-
-            if result:
-                queue_name, job_json = result
-                job_data = json.loads(job_json)
-                print(f"Processing job: {job_data}")
-                process_job(job_data)
-
-        except KeyboardInterrupt:
-            print("Worker shutting down...")
-            break
+            # Wait for one free slot, then claim any others that are free too;
+            # time out so a shutdown is noticed while every slot is busy
+            if not job_slots.acquire(timeout=1):
+                continue
+            if shutdown.is_set():
+                job_slots.release()
+                break
+            reserved = 1
+            while reserved < JOB_BATCH_SIZE and job_slots.acquire(blocking=False):
+                reserved += 1
+
+            try:
+                # Pop up to one job per claimed slot in a single round trip,
+                # blocking for at most 1 second while the queue is empty
+                result = redis_client.blmpop(
+                    1, 1, "job_queue", direction="LEFT", count=reserved
+                )
+
+                if result:
+                    queue_name, job_jsons = result
+                    for job_json in job_jsons:
+                        executor.submit(handle_job, job_json)
+                        reserved -= 1
+            finally:
+                for _ in range(reserved):
+                    job_slots.release()
+
         except Exception as e:
-            print(f"Error processing job: {e}")
+            logger.error("Error fetching job: %s", e)
             time.sleep(1)
 
+    executor.shutdown(wait=True)
+    stop_flusher.set()
+    flusher.join()
+    http_client.close()
+    db_pool.closeall()
+    log_listener.stop()
+
 
 if __name__ == "__main__":
     main()